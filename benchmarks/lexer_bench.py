@@ -0,0 +1,307 @@
+"""
+Lexer benchmark.
+
+usage: python benchmarks/lexer_bench.py [--size 1K] [--size 1M] [--seed 0] [--mode fast|full]
+                                        [--repeat 5] [--min-time 0.2] [--output results.json]
+                                        [--compare baseline.json] [--threshold 0.1] [--gate-startup]
+
+Each corpus is lexed as one whole source, the way batch mode in
+interpreter/__main__.py drives the Lexer. Timings are CPU time, so other load on
+the machine doesn't count. Each timing repeats the work until it has run for at
+least --min-time, and the reported value is the median of --repeat timings.
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from interpreter.lexer import Lexer, LexerMode
+from interpreter.token import TokenType
+
+SIZE_UNITS = {'K': 1024, 'M': 1024 * 1024}
+
+IDENTIFIERS = ['a', 'b', 'i', 'x', 'count', 'total', 'value2', 'result', 'item', 'buffer']
+KEYWORDS = ['if', 'for', 'while', 'enforce', 'raise', 'in', 'as']
+OPERATORS = ['+', '-', '/', '%', '^', '<', '>', '<=', '>=', '==', '!=', '&&', '||',
+             '&', '|', '<<', '>>', '^^', '?']
+ASSIGNS = ['=', '+=', '-=', '/=', '&=', '|=']
+ESCAPES = ['\\n', '\\t', '\\\\', '\\x41', '\\u00e9', '\\101']
+
+# metrics where a larger number is better; everything else is "lower is better"
+HIGHER_IS_BETTER = {'tokens_per_sec'}
+# settings that must match the baseline entry for its metrics to be comparable
+COMPARABLE_KEYS = ('seed', 'mode', 'bytes')
+# metrics checked by --compare; startup_seconds only with --gate-startup
+GATED_METRICS = ('tokens_per_sec', 'peak_memory_bytes')
+
+
+def parse_size(text):
+    unit = text[-1].upper()
+    if unit in SIZE_UNITS:
+        return int(float(text[:-1]) * SIZE_UNITS[unit])
+    return int(text)
+
+
+def gen_operand(rng):
+    kind = rng.random()
+    if kind < 0.5:
+        return rng.choice(IDENTIFIERS)
+    if kind < 0.7:
+        return str(rng.randint(0, 100000))
+    if kind < 0.85:
+        return '{}.{}'.format(rng.randint(0, 999), rng.randint(0, 999))
+    quote = rng.choice(['\'', '"'])
+    body = ''.join(rng.choice(IDENTIFIERS + ESCAPES + [' ']) for _ in range(rng.randint(0, 6)))
+    return quote + body + quote
+
+
+def gen_expr(rng, depth=0):
+    expr = gen_operand(rng)
+    for _ in range(rng.randint(0, 3)):
+        if depth < 2 and rng.random() < 0.2:
+            expr += ' {} ({})'.format(rng.choice(OPERATORS), gen_expr(rng, depth + 1))
+        else:
+            expr += ' {} {}'.format(rng.choice(OPERATORS), gen_operand(rng))
+    return expr
+
+
+def gen_line(rng, indent):
+    kind = rng.random()
+    if kind < 0.1:
+        line = '// ' + ' '.join(rng.choice(IDENTIFIERS) for _ in range(rng.randint(1, 8)))
+    elif kind < 0.15:
+        line = '/* ' + ' '.join(rng.choice(IDENTIFIERS) for _ in range(rng.randint(1, 8))) + ' */'
+    elif kind < 0.3:
+        line = '{} {}'.format(rng.choice(KEYWORDS), gen_expr(rng))
+    elif kind < 0.4:
+        args = ', '.join(gen_expr(rng) for _ in range(rng.randint(0, 3)))
+        line = '{}({})'.format(rng.choice(IDENTIFIERS), args)
+    elif kind < 0.5:
+        items = ', '.join(gen_operand(rng) for _ in range(rng.randint(0, 6)))
+        line = '{} = [{}]'.format(rng.choice(IDENTIFIERS), items)
+    else:
+        line = '{} {} {}'.format(rng.choice(IDENTIFIERS), rng.choice(ASSIGNS), gen_expr(rng))
+    return ' ' * (4 * indent) + line
+
+
+def generate_corpus(size, seed):
+    """
+    generate a list of source lines totalling roughly 'size' bytes (newlines included)
+    """
+    rng = random.Random(seed)
+    lines = list()
+    total = 0
+    indent = 0
+    while total < size:
+        line = gen_line(rng, indent)
+        lines.append(line)
+        total += len(line) + 1
+        step = rng.random()
+        if step < 0.15 and indent < 4:
+            indent += 1
+        elif step < 0.3 and indent > 0:
+            indent -= 1
+    return lines
+
+
+def lex_source(text, mode):
+    count = 0
+    lexer = Lexer(text, mode)
+    while True:
+        token = lexer.get_next_token()
+        count += 1
+        if token.lexeme == TokenType.EOF:
+            break
+    return count
+
+
+def lex_tokens(text, mode):
+    tokens = list()
+    lexer = Lexer(text, mode)
+    while True:
+        token = lexer.get_next_token()
+        tokens.append(token)
+        if token.lexeme == TokenType.EOF:
+            break
+    return tokens
+
+
+def startup_seconds(min_time):
+    """
+    CPU seconds of one interpreter import in a fresh process, averaged over as many runs as fit in 'min_time'
+    """
+    runs = 0
+    elapsed = 0.0
+    while elapsed < min_time:
+        before = resource.getrusage(resource.RUSAGE_CHILDREN)
+        subprocess.run([sys.executable, '-c', 'import interpreter.lexer, interpreter.parser'],
+                       cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), check=True)
+        after = resource.getrusage(resource.RUSAGE_CHILDREN)
+        elapsed += (after.ru_utime + after.ru_stime) - (before.ru_utime + before.ru_stime)
+        runs += 1
+    return elapsed / runs
+
+
+def measure_startup(repeat, min_time):
+    return statistics.median(startup_seconds(min_time) for _ in range(repeat))
+
+
+def lex_seconds(text, mode, min_time):
+    """
+    CPU seconds of one lex of 'text', averaged over as many runs as fit in 'min_time'
+    """
+    runs = 0
+    start = time.process_time()
+    while True:
+        lex_source(text, mode)
+        runs += 1
+        elapsed = time.process_time() - start
+        if elapsed >= min_time:
+            return elapsed / runs
+
+
+def measure_memory(lines, mode):
+    """
+    peak traced bytes for building the source text and holding every one of its tokens
+    """
+    tracemalloc.start()
+    text = '\n'.join(lines) + '\n'
+    tokens = lex_tokens(text, mode)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del text, tokens
+    return peak
+
+
+def bench_size(size, seed, mode, repeat, min_time):
+    lines = generate_corpus(size, seed)
+    text = '\n'.join(lines) + '\n'
+
+    tokens = lex_source(text, mode)
+    elapsed = statistics.median(lex_seconds(text, mode, min_time) for _ in range(repeat))
+    peak = measure_memory(lines, mode)
+
+    return {
+        'bytes': len(text),
+        'lines': len(lines),
+        'seed': seed,
+        'mode': mode,
+        'repeat': repeat,
+        'min_time': min_time,
+        'tokens': tokens,
+        'lex_seconds': elapsed,
+        'tokens_per_sec': tokens / elapsed if elapsed else 0.0,
+        'peak_memory_bytes': peak,
+    }
+
+
+def mismatches(results, baseline):
+    """
+    return a list of human readable reasons why 'results' can't be compared against 'baseline'
+    """
+    errors = list()
+    for name in baseline:
+        if name not in results:
+            errors.append('{}: in the baseline but not measured by this run'.format(name))
+    for name, metrics in results.items():
+        if name not in baseline:
+            continue
+        for key in COMPARABLE_KEYS:
+            if key in metrics and metrics[key] != baseline[name].get(key):
+                errors.append('{}.{}: baseline has {!r}, this run has {!r}'.format(
+                    name, key, baseline[name].get(key), metrics[key]))
+    return errors
+
+
+def compare(results, baseline, threshold, gated=GATED_METRICS):
+    """
+    return a list of human readable regressions of 'results' against 'baseline',
+    and how many metrics were compared
+    """
+    regressions = list()
+    compared = 0
+    for name, metrics in results.items():
+        if name not in baseline:
+            continue
+        for metric, value in metrics.items():
+            if metric not in gated:
+                continue
+            old = baseline[name].get(metric)
+            if not old:
+                continue
+            compared += 1
+            if metric in HIGHER_IS_BETTER:
+                change = (old - value) / old
+            else:
+                change = (value - old) / old
+            if change > threshold:
+                regressions.append('{}.{}: {:.6g} -> {:.6g} ({:+.1%})'.format(
+                    name, metric, old, value, change))
+    return regressions, compared
+
+
+def main(argv=None):
+    argparser = argparse.ArgumentParser(description='benchmark the PyTheeLang lexer')
+    argparser.add_argument('--size', action='append',
+                           help='corpus size such as 1K, 1M or 100M (repeatable, default 1K and 1M)')
+    argparser.add_argument('--seed', type=int, default=0)
+    argparser.add_argument('--mode', choices=('fast', 'full'), default='fast',
+                           help='lexer mode to measure (default fast)')
+    argparser.add_argument('--repeat', type=int, default=5,
+                           help='timings per measurement, the median is reported (default 5)')
+    argparser.add_argument('--min-time', type=float, default=0.2,
+                           help='CPU seconds each timing runs for at least (default 0.2)')
+    argparser.add_argument('--output', help='write results as JSON to this file instead of stdout')
+    argparser.add_argument('--compare', help='baseline JSON to compare results against')
+    argparser.add_argument('--threshold', type=float, default=0.1,
+                           help='allowed relative regression before failing (default 0.1)')
+    argparser.add_argument('--gate-startup', action='store_true',
+                           help='also fail --compare on startup time regressions')
+    args = argparser.parse_args(argv)
+    if args.repeat < 1:
+        argparser.error('--repeat must be at least 1')
+
+    results = dict()
+    results['startup'] = {'startup_seconds': measure_startup(args.repeat, args.min_time), 'repeat': args.repeat}
+    for size in args.size or ['1K', '1M']:
+        results['lex_' + size] = bench_size(parse_size(size), args.seed, args.mode.upper(),
+                                            args.repeat, args.min_time)
+
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        errors = mismatches(results, baseline)
+        if errors:
+            for error in errors:
+                print('error: not comparable with baseline: ' + error, file=sys.stderr)
+            return 2
+        gated = GATED_METRICS + ('startup_seconds',) if args.gate_startup else GATED_METRICS
+        regressions, compared = compare(results, baseline, args.threshold, gated)
+        if not compared:
+            print('error: no metric was compared with the baseline', file=sys.stderr)
+            return 2
+        for regression in regressions:
+            print('regression: ' + regression, file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
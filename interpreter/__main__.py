@@ -1,16 +1,134 @@
-from .lexer import Lexer
+from .lexer import Lexer, LexerMode
 from .token import Token, TokenType
 
-while True:
-    try:
-        text = input('> ')
-    except EOFError:
-        break
-    if not text:
-        continue
-    lexer = Lexer(text)
+import argparse
+import os
+import sys
+from contextlib import nullcontext
+
+argparser = argparse.ArgumentParser(prog='python -m interpreter')
+argparser.add_argument('files', nargs='*', metavar='FILE',
+                       help='lex whole files in batch mode instead of starting the REPL ("-" reads stdin)')
+argparser.add_argument('--batch', action='store_true',
+                       help='batch mode on stdin when no FILE is given')
+argparser.add_argument('--format', choices=('jsonl', 'binary'),
+                       help='batch mode output format (default jsonl)')
+argparser.add_argument('--full', action='store_true',
+                       help='keep comment tokens and record token spans, for formatters and linters')
+argparser.add_argument('--profile', action='store_true',
+                       help='profile the session and write flamegraph collapsed stacks to stderr')
+argparser.add_argument('--profile-output', metavar='FILE',
+                       help='with --profile, write the collapsed stacks to FILE and a summary to stderr instead')
+args = argparser.parse_args()
+if args.profile_output is not None:
+    if not args.profile:
+        argparser.error('--profile-output requires --profile')
+    if os.path.realpath(args.profile_output) in [os.path.realpath(path) for path in args.files if path != '-']:
+        argparser.error('--profile-output would overwrite the source {}'.format(args.profile_output))
+if args.format is not None and not (args.files or args.batch):
+    argparser.error('--format only applies in batch mode (give FILE or --batch)')
+mode = LexerMode.FULL if args.full else LexerMode.FAST
+
+profiler = None
+if args.profile:
+    from .profile import Profiler
+    profiler = Profiler()
+
+def phase(name):
+    if profiler is None:
+        return nullcontext()
+    return profiler.phase(name)
+
+def tokens_of(lexer):
+    if profiler is None:
+        return lex_all(lexer)
+    return profiler.tokens(lexer)
+
+def lex_all(lexer):
     while True:
         token = lexer.get_next_token()
-        print(token)
-        if(token.lexeme == TokenType.EOF):
+        yield token
+        if token.lexeme == TokenType.EOF:
             break
+
+def batch(paths):
+    """
+    lex every path as one source and stream the tokens to stdout as they are lexed, each source
+    ending with its EOF token, or with a STREAM_ERROR record if it fails to lex part way through
+    """
+    from .tokenstream import MAGIC, STREAM_ERROR, write_binary, write_jsonl
+
+    out = sys.stdout.buffer
+
+    def write_binary_tokens(tokens):
+        write_binary(tokens, out, header=False)
+
+    def write_jsonl_tokens(tokens):
+        write_jsonl(tokens, out)
+
+    if args.format == 'binary':
+        out.write(MAGIC)
+        write = write_binary_tokens
+    else:
+        write = write_jsonl_tokens
+
+    status = 0
+    for path in paths:
+        try:
+            # decode stdin the same way as files so the same bytes lex the same
+            with phase('read'):
+                if path == '-':
+                    text = sys.stdin.buffer.read().decode('utf-8')
+                else:
+                    with open(path, encoding='utf-8') as f:
+                        text = f.read()
+        except (OSError, UnicodeDecodeError) as e:
+            print('{}: {}'.format(path, e), file=sys.stderr)
+            status = 1
+            continue
+        lexer = Lexer(text, mode)
+        try:
+            with phase('output'):
+                write(tokens_of(lexer))
+        except OSError:
+            raise
+        except Exception as e:
+            message = '{}: {}'.format(path, e)
+            write([Token(STREAM_ERROR, message)])
+            print(message, file=sys.stderr)
+            status = 1
+    out.flush()
+    return status
+
+def repl():
+    while True:
+        try:
+            text = input('> ')
+        except EOFError:
+            break
+        if not text:
+            continue
+        lexer = Lexer(text, mode)
+        with phase('output'):
+            for token in tokens_of(lexer):
+                print(token)
+    return 0
+
+if args.files or args.batch:
+    status = batch(args.files or ['-'])
+else:
+    status = repl()
+
+if profiler is not None:
+    if args.profile_output is None:
+        # stderr stays pure collapsed stacks so it can be piped into flamegraph tools
+        for line in profiler.collapsed():
+            print(line, file=sys.stderr)
+    else:
+        for line in profiler.summary():
+            print(line, file=sys.stderr)
+        with open(args.profile_output, 'w') as f:
+            f.write('\n'.join(profiler.collapsed()) + '\n')
+
+if status:
+    sys.exit(status)
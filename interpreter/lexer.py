@@ -18,15 +18,27 @@ def decode_escapes(s):
 
     return ESCAPE_SEQUENCE_RE.sub(decode_match, s)
 
+class LexerMode:
+    # for compiling: comments are skipped without producing tokens and no spans are recorded
+    FAST = 'FAST'
+    # for tooling: every token, comments included, carries the (start, end) span of its text;
+    # whitespace trivia is whatever lies between consecutive spans
+    FULL = 'FULL'
+
 class Lexer:
 
-    def __init__(self, text):
+    def __init__(self, text, mode=LexerMode.FAST):
+        if mode != LexerMode.FAST and mode != LexerMode.FULL:
+            raise Exception('Unknown lexer mode {!r}'.format(mode))
         # input
         self.text = text
+        self.mode = mode
         self.pos = 0
+        # end of the last token's text, before its trailing spaces (LexerMode.FULL only)
+        self.token_end = None
         # current token instance
         self.current_token = None
-        self.current_char = self.text[self.pos]
+        self.current_char = self.text[self.pos] if self.text else None
 
     def error(self):
         raise Exception('Error parsing input')
@@ -38,7 +50,15 @@ class Lexer:
             self.current_char = None  # Indicates end of input
         else:
             self.current_char = self.text[self.pos]
-            
+
+    def jump(self, pos):
+        """Move the 'pos' pointer straight to 'pos' and set the 'current_char' variable."""
+        self.pos = pos
+        if self.pos > len(self.text) - 1:
+            self.current_char = None  # Indicates end of input
+        else:
+            self.current_char = self.text[self.pos]
+
     def peek(self):
         peek_pos = self.pos + 1
         if peek_pos > len(self.text) - 1:
@@ -47,6 +67,8 @@ class Lexer:
             return self.text[peek_pos]
 
     def skip_whitespace(self):
+        if self.mode == LexerMode.FULL:
+            self.token_end = self.pos
         while self.current_char is not None and self.current_char == ' ':
             self.advance()
 
@@ -57,16 +79,23 @@ class Lexer:
             result += self.current_char
             self.advance()
 
-        token = RESERVED_KEYWORDS.get(result, Token('identifier', result))
+        if result in RESERVED_KEYWORDS:
+            token = Token(result, result)
+        else:
+            token = Token('identifier', result)
         self.skip_whitespace()
         return token
 
     def space(self):
         result = 0
-        while self.current_char is not None and self.current_char.isspace():
+        while self.current_char is not None and self.current_char.isspace() and self.current_char != '\n':
             result += 1
             self.advance()
-        return Token(TokenType.INDENT, result)        
+        return Token(TokenType.INDENT, result)
+
+    def end_statement(self):
+        self.advance()
+        return Token(TokenType.END_STATEMENT, None)
     
     def digit(self):
         result = ''
@@ -111,7 +140,9 @@ class Lexer:
             self.advance()
         self.advance()
         self.skip_whitespace()
-        return Token(TokenType.STR_LITERAL, decode_escapes(result))
+        if '\\' in result:
+            result = decode_escapes(result)
+        return Token(TokenType.STR_LITERAL, result)
         
     def sstr(self):
         result = ''
@@ -128,7 +159,9 @@ class Lexer:
             self.advance()
         self.advance()
         self.skip_whitespace()
-        return Token(TokenType.STR_LITERAL, decode_escapes(result))
+        if '\\' in result:
+            result = decode_escapes(result)
+        return Token(TokenType.STR_LITERAL, result)
 
     def sep(self):
         self.advance()
@@ -165,28 +198,35 @@ class Lexer:
         self.skip_whitespace()
         return Token(TokenType.CURL_E, 'CURL_E')
 
+    def comment_end(self):
+        end = self.text.find('\n', self.pos + 2)
+        return len(self.text) if end == -1 else end
+
+    def multi_comment_end(self):
+        end = self.text.find('*/', self.pos + 2)
+        if end == -1:
+            self.error()
+        return end
+
     def comment(self):
-        result = ''
-        self.advance()
-        self.advance()
-        while self.current_char is not None and self.current_char != '\n':
-            result += self.current_char
-            self.advance()
+        end = self.comment_end()
+        result = self.text[self.pos + 2:end]
+        self.jump(end)
         return Token(TokenType.COMMENT, result)
 
     def multi_comment(self):
-        result = ''
-        self.advance()
-        self.advance()
-        while self.current_char is not None and not(self.current_char == '*' and self.peek() == '/'):
-            result += self.current_char
-            self.advance()
-        if self.current_char is None:
-            self.error()
-        self.advance()
-        self.advance()
+        end = self.multi_comment_end()
+        result = self.text[self.pos + 2:end]
+        self.jump(end + 2)
+        self.skip_whitespace()
         return Token(TokenType.MULTI_COMMENT, result)
 
+    def skip_comment(self):
+        self.jump(self.comment_end())
+
+    def skip_multi_comment(self):
+        self.jump(self.multi_comment_end() + 2)
+
     def divide_assign(self):
         self.advance()
         self.advance()
@@ -224,7 +264,7 @@ class Lexer:
         self.advance()
         self.advance()
         self.skip_whitespace()
-        return Token(TokenType.EXP, 'EXP_ASSIGN')
+        return Token(TokenType.EXP_ASSIGN, 'EXP_ASSIGN')
     
     def exp(self):
         self.advance()
@@ -364,13 +404,21 @@ class Lexer:
         """
         Lexer
         """
-
+        if self.mode == LexerMode.FULL:
+            start = self.pos
+            self.token_end = None
+            token = self.scan_token()
+            token.span = (start, self.pos if self.token_end is None else self.token_end)
+            return token
+        return self.scan_token()
+
+    def scan_token(self):
         while self.current_char is not None:
             if self.current_char.isalpha():
                 return self.identifier()
         
             if self.current_char == '\n':
-                return Token(TokenType.END_STATEMENT, None)
+                return self.end_statement()
 
             if self.current_char.isspace():
                 return self.space()
@@ -409,9 +457,18 @@ class Lexer:
                 return self.curl_e()
 
             if self.current_char == '/' and self.peek() == '/':
+                if self.mode == LexerMode.FAST:
+                    self.skip_comment()
+                    self.skip_whitespace()
+                    continue
                 return self.comment()
 
             if self.current_char == '/' and self.peek() == '*':
+                if self.mode == LexerMode.FAST:
+                    # the spaces after a comment are not indentation, whatever came before it was
+                    self.skip_multi_comment()
+                    self.skip_whitespace()
+                    continue
                 return self.multi_comment()
 
             if self.current_char == '/' and self.peek() == '=':
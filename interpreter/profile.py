@@ -0,0 +1,88 @@
+from .token import TokenType
+
+import time
+from contextlib import contextmanager
+
+class Profiler:
+    """
+    Opt-in instrumentation. Nothing in Lexer or Parser knows about it, so
+    there is no cost unless the caller routes work through a Profiler.
+    """
+
+    def __init__(self):
+        self.phase_times = dict()  # phase name -> seconds, including tokens() run inside it
+        self.inner_times = dict()  # phase name -> seconds of it spent inside tokens()
+        self.token_times = dict()  # token lexeme -> seconds spent producing it
+        self.token_counts = dict()  # token lexeme -> count
+        self.overhead = 0.0  # seconds tokens() spent on its own bookkeeping rather than lexing
+        self.current_phase = None
+
+    @contextmanager
+    def phase(self, name):
+        """Time the body of a with statement as pipeline phase 'name'."""
+        outer = self.current_phase
+        self.current_phase = name
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phase_times[name] = self.phase_times.get(name, 0.0) + time.perf_counter() - start
+            self.current_phase = outer
+
+    def tokens(self, lexer):
+        """
+        Yield every token of 'lexer' up to and including EOF, timing each get_next_token.
+        Time spent in here is taken out of the enclosing phase and split into lexing
+        and profiler overhead.
+        """
+        clock = time.perf_counter
+        phase = self.current_phase
+        lexing = 0.0
+        inside = 0.0
+        running_since = clock()
+        try:
+            while True:
+                start = clock()
+                token = lexer.get_next_token()
+                elapsed = clock() - start
+                lexing += elapsed
+                self.token_times[token.lexeme] = self.token_times.get(token.lexeme, 0.0) + elapsed
+                self.token_counts[token.lexeme] = self.token_counts.get(token.lexeme, 0) + 1
+                inside += clock() - running_since
+                yield token
+                running_since = clock()
+                if token.lexeme == TokenType.EOF:
+                    break
+            inside += clock() - running_since
+        finally:
+            self.overhead += max(inside - lexing, 0.0)
+            if phase is not None:
+                self.inner_times[phase] = self.inner_times.get(phase, 0.0) + inside
+
+    def self_times(self):
+        """Seconds per frame: 'lex;<lexeme>' per token type, 'profiler', and each phase's own time."""
+        frames = dict()
+        for lexeme, seconds in self.token_times.items():
+            frames['lex;' + lexeme] = seconds
+        if self.token_times:
+            frames['profiler'] = self.overhead
+        for name, seconds in self.phase_times.items():
+            frames[name] = max(seconds - self.inner_times.get(name, 0.0), 0.0)
+        return frames
+
+    def collapsed(self):
+        """
+        Collapsed stack lines ('frame;frame weight'), readable by flamegraph.pl
+        and speedscope. Weights are microseconds.
+        """
+        return ['{} {}'.format(frame, int(seconds * 1e6)) for frame, seconds in sorted(self.self_times().items())]
+
+    def summary(self):
+        lines = list()
+        lines.append('lex: {:.6f}s'.format(sum(self.token_times.values())))
+        lines.append('profiler overhead: {:.6f}s'.format(self.overhead))
+        for name, seconds in sorted(self.phase_times.items()):
+            lines.append('phase {}: {:.6f}s'.format(name, max(seconds - self.inner_times.get(name, 0.0), 0.0)))
+        for lexeme, count in sorted(self.token_counts.items(), key=lambda item: -item[1]):
+            lines.append('token {}: {}'.format(lexeme, count))
+        return lines
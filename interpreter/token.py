@@ -1,9 +1,11 @@
 class Token:    
-    def __init__(self, lexeme, value):
+    def __init__(self, lexeme, value, span=None):
         # token type:
         self.lexeme = lexeme
         # token value:
         self.value = value
+        # (start, end) offsets of the token text in the source, if recorded:
+        self.span = span
 
     def __str__(self):
         """
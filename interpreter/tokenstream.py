@@ -0,0 +1,148 @@
+from .token import Token, TokenType, RESERVED_KEYWORDS
+
+import struct
+from json.encoder import encode_basestring_ascii
+
+# compact binary token stream:
+#   header: MAGIC
+#   token:  <u8 lexeme code>[payload]
+# payloads:
+#   INT_LITERAL                              zigzag varint
+#   FLT_LITERAL                              little endian f64
+#   INDENT                                   varint
+#   identifier, STR_LITERAL, COMMENT,
+#   MULTI_COMMENT, STREAM_ERROR              varint byte length + utf-8 (surrogatepass)
+#   anything else                            none, the value is implied by the lexeme
+# token spans are not part of the binary stream
+MAGIC = b'PTLT\x01'
+
+# record written in place of the rest of a source that failed to lex, its value is the error message
+STREAM_ERROR = 'STREAM_ERROR'
+
+LEXEMES = ['identifier'] + sorted(
+    value for name, value in vars(TokenType).items() if not name.startswith('_')
+) + sorted(RESERVED_KEYWORDS) + [STREAM_ERROR]
+LEXEME_CODES = {lexeme: code for code, lexeme in enumerate(LEXEMES)}
+
+TEXT_LEXEMES = frozenset((
+    'identifier', TokenType.STR_LITERAL, TokenType.COMMENT, TokenType.MULTI_COMMENT, STREAM_ERROR
+))
+NONE_LEXEMES = frozenset((TokenType.END_STATEMENT, TokenType.EOF))
+INT_LEXEMES = frozenset((TokenType.INT_LITERAL, TokenType.INDENT))
+
+FLUSH_SIZE = 1 << 16
+
+DOUBLE = struct.Struct('<d')
+
+def encode_varint(buffer, value):
+    while value > 0x7f:
+        buffer.append((value & 0x7f) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+def decode_varint(data, pos):
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7f) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+def encode_token(buffer, token):
+    lexeme = token.lexeme
+    buffer.append(LEXEME_CODES[lexeme])
+    if lexeme == TokenType.INT_LITERAL:
+        value = token.value
+        encode_varint(buffer, value << 1 if value >= 0 else ((-value) << 1) - 1)
+    elif lexeme == TokenType.FLT_LITERAL:
+        buffer += DOUBLE.pack(token.value)
+    elif lexeme == TokenType.INDENT:
+        encode_varint(buffer, token.value)
+    elif lexeme in TEXT_LEXEMES:
+        text = token.value.encode('utf-8', 'surrogatepass')
+        encode_varint(buffer, len(text))
+        buffer += text
+
+def write_binary(tokens, out, header=True):
+    """
+    Write 'tokens' to the binary file object 'out' as they come, flushing in FLUSH_SIZE chunks.
+    Whatever was encoded is written out even if 'tokens' raises.
+    """
+    buffer = bytearray(MAGIC if header else b'')
+    try:
+        for token in tokens:
+            encode_token(buffer, token)
+            if len(buffer) >= FLUSH_SIZE:
+                out.write(buffer)
+                buffer.clear()
+    finally:
+        out.write(buffer)
+
+def write_jsonl(tokens, out):
+    """
+    Write 'tokens' to the binary file object 'out' as one JSON object per line, as they come.
+    Whatever was encoded is written out even if 'tokens' raises.
+    """
+    # lexeme names and the values implied by them are plain ascii words, so only
+    # free text needs escaping and each line can be filled into a fixed template
+    lines = list()
+    size = 0
+    try:
+        for token in tokens:
+            lexeme = token.lexeme
+            value = token.value
+            if value is None:
+                value = 'null'
+            elif lexeme in TEXT_LEXEMES:
+                value = encode_basestring_ascii(value)
+            elif lexeme in INT_LEXEMES:
+                value = str(value)
+            elif lexeme == TokenType.FLT_LITERAL:
+                value = repr(value)
+            else:
+                value = '"' + value + '"'
+            span = token.span
+            if span is None:
+                line = '{"lexeme":"%s","value":%s}' % (lexeme, value)
+            else:
+                line = '{"lexeme":"%s","value":%s,"span":[%d,%d]}' % (lexeme, value, span[0], span[1])
+            lines.append(line)
+            size += len(line)
+            if size >= FLUSH_SIZE:
+                lines.append('')
+                out.write('\n'.join(lines).encode('ascii'))
+                lines.clear()
+                size = 0
+    finally:
+        if lines:
+            lines.append('')
+            out.write('\n'.join(lines).encode('ascii'))
+
+def read_binary(data):
+    """Yield the tokens encoded in 'data' by write_binary."""
+    if not data.startswith(MAGIC):
+        raise Exception('Invalid token stream')
+    pos = len(MAGIC)
+    while pos < len(data):
+        lexeme = LEXEMES[data[pos]]
+        pos += 1
+        if lexeme == TokenType.INT_LITERAL:
+            value, pos = decode_varint(data, pos)
+            value = -((value + 1) >> 1) if value & 1 else value >> 1
+        elif lexeme == TokenType.FLT_LITERAL:
+            value, = DOUBLE.unpack_from(data, pos)
+            pos += DOUBLE.size
+        elif lexeme == TokenType.INDENT:
+            value, pos = decode_varint(data, pos)
+        elif lexeme in TEXT_LEXEMES:
+            length, pos = decode_varint(data, pos)
+            value = bytes(data[pos:pos + length]).decode('utf-8', 'surrogatepass')
+            pos += length
+        elif lexeme in NONE_LEXEMES:
+            value = None
+        else:
+            value = lexeme
+        yield Token(lexeme, value)
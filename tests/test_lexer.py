@@ -0,0 +1,93 @@
+from interpreter.lexer import Lexer, LexerMode
+from interpreter.token import TokenType
+
+
+def lex(text, *args):
+    lexer = Lexer(text, *args)
+    tokens = list()
+    while True:
+        token = lexer.get_next_token()
+        tokens.append(token)
+        if token.lexeme == TokenType.EOF:
+            return tokens
+
+
+def pairs(tokens):
+    return [(token.lexeme, token.value) for token in tokens]
+
+
+def test_empty_input():
+    assert pairs(lex('')) == [(TokenType.EOF, None)]
+
+
+def test_newline_advances_to_next_line():
+    assert pairs(lex('a\nb')) == [
+        ('identifier', 'a'),
+        (TokenType.END_STATEMENT, None),
+        ('identifier', 'b'),
+        (TokenType.EOF, None),
+    ]
+
+
+def test_indent_stops_at_newline():
+    assert pairs(lex('  \n    b')) == [
+        (TokenType.INDENT, 2),
+        (TokenType.END_STATEMENT, None),
+        (TokenType.INDENT, 4),
+        ('identifier', 'b'),
+        (TokenType.EOF, None),
+    ]
+
+
+def test_exp_assign():
+    assert pairs(lex('x ^= 2'))[1] == (TokenType.EXP_ASSIGN, 'EXP_ASSIGN')
+
+
+SOURCE = '''// leading comment
+x = 1 /* inline */ + "s" // trailing
+    /* indented */ y
+/* c */ x
+'''
+
+
+def test_unknown_mode_raises():
+    try:
+        Lexer('x', 'fast')
+    except Exception as e:
+        assert 'fast' in str(e)
+    else:
+        assert False, 'expected an exception'
+
+
+def test_default_mode_is_fast():
+    assert Lexer('x').mode == LexerMode.FAST
+
+
+def test_fast_is_full_without_comments():
+    full = pairs(lex(SOURCE, LexerMode.FULL))
+    fast = pairs(lex(SOURCE, LexerMode.FAST))
+    assert fast == [pair for pair in full if pair[0] not in (TokenType.COMMENT, TokenType.MULTI_COMMENT)]
+    assert all(token.span is None for token in lex(SOURCE, LexerMode.FAST))
+
+
+def test_spans_cover_token_text():
+    tokens = lex(SOURCE, LexerMode.FULL)
+    texts = [SOURCE[token.span[0]:token.span[1]] for token in tokens]
+    assert texts[:6] == ['// leading comment', '\n', 'x', '=', '1', '/* inline */']
+    assert texts[-1] == ''
+    # nothing but spaces lies between consecutive spans
+    end = 0
+    for token in tokens:
+        assert set(SOURCE[end:token.span[0]]) <= {' '}
+        end = token.span[1]
+    assert end == len(SOURCE)
+
+
+def test_no_indent_after_block_comment():
+    # deliberate change from the original lexer, which emitted INDENT(1) before x
+    assert pairs(lex('/* c */ x', LexerMode.FULL)) == [
+        (TokenType.MULTI_COMMENT, ' c '),
+        ('identifier', 'x'),
+        (TokenType.EOF, None),
+    ]
+    assert pairs(lex('/* c */ x', LexerMode.FAST)) == [('identifier', 'x'), (TokenType.EOF, None)]
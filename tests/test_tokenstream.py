@@ -0,0 +1,64 @@
+import io
+import json
+
+from interpreter.lexer import Lexer, LexerMode
+from interpreter.token import Token, TokenType
+from interpreter.tokenstream import STREAM_ERROR, read_binary, write_binary, write_jsonl
+
+SOURCE = '''enforce x as int
+if x >= -10 && y != 2.5
+    s = "tab\\there \\u00e9 \\ud800" + 'plain'
+    x ^= 1 // comment
+/* block */ z = 123456789012345678901234567890
+'''
+
+
+def lex(text):
+    lexer = Lexer(text, LexerMode.FULL)
+    tokens = list()
+    while True:
+        token = lexer.get_next_token()
+        tokens.append(token)
+        if token.lexeme == TokenType.EOF:
+            return tokens
+
+
+def pairs(tokens):
+    return [(token.lexeme, token.value) for token in tokens]
+
+
+def test_binary_round_trip():
+    tokens = lex(SOURCE) + [Token(TokenType.INT_LITERAL, -7), Token(STREAM_ERROR, 'f: Error parsing input')]
+    out = io.BytesIO()
+    write_binary(tokens, out)
+    assert pairs(read_binary(out.getvalue())) == pairs(tokens)
+
+
+def test_jsonl_round_trip():
+    tokens = lex(SOURCE)
+    out = io.BytesIO()
+    write_jsonl(tokens, out)
+    records = [json.loads(line) for line in out.getvalue().decode('ascii').splitlines()]
+    assert [(record['lexeme'], record['value']) for record in records] == pairs(tokens)
+    assert [tuple(record['span']) if 'span' in record else None for record in records] == \
+        [token.span for token in tokens]
+
+
+def test_writers_flush_what_was_encoded_when_tokens_raise():
+    def failing():
+        yield Token('identifier', 'a')
+        raise Exception('Error parsing input')
+
+    for write in (write_binary, write_jsonl):
+        out = io.BytesIO()
+        try:
+            write(failing(), out)
+        except Exception:
+            pass
+        assert out.getvalue()
+    out = io.BytesIO()
+    try:
+        write_binary(failing(), out)
+    except Exception:
+        pass
+    assert pairs(read_binary(out.getvalue())) == [('identifier', 'a')]